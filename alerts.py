@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:45:13 2026
+
+This file contains the classes that make the notifications robust against noise
+of the temperature sensors. ThresholdConfirmation decides if a threshold was
+really reached: at least confirm_samples of the last window_samples readings
+have to be past the threshold for at least dwell_time seconds. Once the threshold
+is confirmed, it only counts as cleared when a reading passed the threshold by the
+relative hysteresis band in the other direction. The readings are forgotten when the
+threshold or the direction changes.
+AlertLimiter makes sure that an alert that repeats while its condition lasts (e.g.
+repeated disconnections) is not sent again within alert_interval. The alert is
+cleared when the condition is over, so that the next occurrence is sent again.
+All parameters are defined in the [ALERTS] section of the config.ini file.
+"""
+
+import time
+import configparser
+from collections import deque
+
+
+def read_alert_config():
+    config = configparser.ConfigParser(inline_comment_prefixes="#")
+    config.read('config.ini')
+    if not config.has_section('ALERTS'):
+        config.add_section('ALERTS')
+    return config['ALERTS']
+
+
+class ThresholdConfirmation:
+    def __init__(self):
+        config_alerts = read_alert_config()
+        self.confirm_samples = int(config_alerts.get('confirm_samples', fallback=3))
+        self.window_samples = max(int(config_alerts.get('window_samples', fallback=5)), self.confirm_samples)
+        self.dwell_time = float(config_alerts.get('dwell_time', fallback=0))
+        self.hysteresis = float(config_alerts.get('hysteresis', fallback=0.05))
+        # the readings in the window were judged against this threshold and direction
+        self.threshold = None
+        self.cooling = None
+        self.reset()
+
+    def reset(self):
+        self.window = deque(maxlen=self.window_samples)
+        self.count = 0
+        self.confirmed = False
+        self.confirmed_since = None
+
+    def update(self,temperature,threshold,cooling,timestamp=None):
+        """
+        Adds a new reading and returns True if the threshold is confirmed, i.e. the
+        temperature is below (or above for cooling=False) the threshold.
+        The window only counts the readings that are past the threshold itself, the
+        hysteresis band is only used to decide when a confirmed threshold is cleared.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        if threshold != self.threshold or cooling != self.cooling:
+            self.threshold = threshold
+            self.cooling = cooling
+            self.reset()
+
+        # ^ is the xor operator
+        past_threshold = cooling ^ (temperature > threshold)
+
+        if self.confirmed:
+            # only clear the threshold if the reading left the hysteresis band,
+            # then the readings have to be confirmed again
+            band = threshold*(1 + self.hysteresis if cooling else 1 - self.hysteresis)
+            if not cooling ^ (temperature < band):
+                return True
+            self.reset()
+
+        # keep the number of readings past the threshold in the window up to date
+        if len(self.window) == self.window.maxlen:
+            self.count -= self.window[0]
+        self.window.append(past_threshold)
+        self.count += past_threshold
+
+        if self.count < self.confirm_samples:
+            self.confirmed_since = None
+            return False
+        if self.confirmed_since is None:
+            self.confirmed_since = timestamp
+        self.confirmed = timestamp - self.confirmed_since >= self.dwell_time
+        return self.confirmed
+
+
+class AlertLimiter:
+    def __init__(self):
+        config_alerts = read_alert_config()
+        self.alert_interval = float(config_alerts.get('alert_interval', fallback=3600))
+        self.last_sent = {}
+
+    def allow(self,key):
+        """
+        Returns True if no alert with the same key was sent within alert_interval.
+        """
+        now = time.time()
+        if key in self.last_sent and now - self.last_sent[key] < self.alert_interval:
+            return False
+        self.last_sent[key] = now
+        return True
+
+    def clear(self,key=None):
+        """
+        Forget the alert with key (or all alerts), e.g. when its condition is over.
+        """
+        if key is None:
+            self.last_sent.clear()
+        else:
+            self.last_sent.pop(key, None)
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:03:52 2026
+
+This file defines a small journal that saves the state of the running program
+mode (start time, current stage, the measured stage times and the last time the
+program was alive) after every stage transition and once per minute. If the program
+stops unexpectedly, the program mode can be resumed from this state with
+python cryostat_monitoring.py --resume.
+The file is written atomically, so that a crash while saving never leaves a
+broken checkpoint behind. Its path can be changed in the config.ini file.
+"""
+
+import os
+import json
+import configparser
+
+
+class Checkpoint:
+    def __init__(self):
+        # Read config file to define where the checkpoint is saved
+        config = configparser.ConfigParser(inline_comment_prefixes="#")
+        config.read('config.ini')
+        self.file = config.get('LOGGING', 'checkpoint_file', fallback='logfiles/checkpoint.json')
+
+    def save(self,procedure):
+        """
+        Write the procedure state in a temporary file and replace the checkpoint
+        with it, which is an atomic operation on Windows and Linux.
+        """
+        tmp_file = self.file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(procedure, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.file)
+
+    def load(self):
+        """
+        Returns the saved procedure state or None if there is nothing to resume.
+        """
+        try:
+            with open(self.file) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def clear(self):
+        """
+        Delete the checkpoint when the program mode finished.
+        """
+        if os.path.isfile(self.file):
+            os.remove(self.file)
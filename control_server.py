@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:12:31 2026
+
+Small HTTP server that allows to control the monitoring program while it runs
+in daemon mode (python cryostat_monitoring.py --daemon). It only listens on the
+local machine by default. The hostname and port are defined in the config.ini file.
+
+Available commands (all answers are JSON):
+    GET  /status      current program mode, stage, thresholds and temperatures
+    POST /start       start a program mode, e.g. {"mode": "Circulation Mode", "circ_val": 0.1}
+    POST /stop        stop the running program mode
+    POST /resume      resume the program mode saved in the checkpoint file after a crash
+    POST /threshold   change the circulation warning temperature, e.g. {"circ_val": 0.2}
+    POST /snapshot    take a snapshot of the readings, e.g. {"status": "Base Temperature"}
+    POST /profile     switch the profiler on or off, e.g. {"enable": true} (see profiling.py)
+
+Example with curl:
+    curl -X POST -d "{\"status\": \"Base Temperature\"}" http://127.0.0.1:8765/snapshot
+"""
+
+import json
+import threading
+import configparser
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logs
+
+
+class ControlHandler(BaseHTTPRequestHandler):
+    # arguments accepted by /start and the types they are converted to
+    start_arguments = {'comment': str, 'still_val': float, 'baseT_val': float,
+                       'circ_val': float, 'status': str}
+
+    def do_GET(self):
+        if self.path == '/status':
+            self.send_json(self.server.ui.status())
+        else:
+            self.send_json({'error': f'Unknown command {self.path}'}, 404)
+
+    def do_POST(self):
+        commands = {
+            '/start': self.cmd_start,
+            '/stop': self.cmd_stop,
+            '/resume': self.cmd_resume,
+            '/threshold': self.cmd_threshold,
+            '/snapshot': self.cmd_snapshot,
+            '/profile': self.cmd_profile,
+            }
+        if self.path not in commands:
+            self.send_json({'error': f'Unknown command {self.path}'}, 404)
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            args = json.loads(self.rfile.read(length) or b'{}')
+            self.send_json(commands[self.path](args))
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_json({'error': f'Invalid arguments: {e}'}, 400)
+        except Exception as e:
+            traceback.print_exc()
+            self.send_json({'error': str(e)}, 500)
+
+    def cmd_start(self, args):
+        mode = args.pop('mode')
+        # check the arguments before the running program mode is stopped
+        unknown = sorted(set(args) - set(self.start_arguments))
+        if unknown:
+            raise ValueError(f'unknown arguments {", ".join(unknown)}')
+        values = {key: None if value is None else self.start_arguments[key](value)
+                  for key, value in args.items()}
+        self.server.ui.request_program(mode, **values)
+        return {'started': mode}
+
+    def cmd_stop(self, args):
+        self.server.ui.request_program(None)
+        return {'stopped': True}
+
+    def cmd_resume(self, args):
+        procedure = self.server.ui.request_resume()
+        return {'resumed': procedure['mode'], 'stage': procedure['stage']}
+
+    def cmd_threshold(self, args):
+        circ_val = float(args['circ_val'])
+        self.server.ui.set_threshold(circ_val)
+        return {'circ_val': circ_val}
+
+    def cmd_snapshot(self, args):
+        status = args.get('status') or 'Base Temperature'
+        self.server.ui.take_snapshot(status)
+        return {'snapshot': status}
+
+    def cmd_profile(self, args):
+        profiler = self.server.ui.profiler
+        if 'enable' not in args:
+            profiler.toggle()
+        elif args['enable']:
+            profiler.start()
+        else:
+            profiler.stop()
+        return {'profiling': profiler.running, 'output_path': profiler.outdir}
+
+    def send_json(self, data, code=200):
+        body = json.dumps(data).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # requests are not printed on the console, only commands are logged by the UI
+        pass
+
+
+class ControlServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, ui):
+        # Read config file to define where the server listens
+        config = configparser.ConfigParser(inline_comment_prefixes="#")
+        config.read('config.ini')
+        self.hostname = config.get('CONTROL', 'hostname', fallback='127.0.0.1')
+        self.port = config.getint('CONTROL', 'port', fallback=8765)
+        self.ui = ui
+        ThreadingHTTPServer.__init__(self, (self.hostname, self.port), ControlHandler)
+
+    def start(self):
+        """
+        Runs the server in a background thread, so that the monitoring can
+        continue in the main thread.
+        """
+        thread = threading.Thread(target=self.serve_forever, name='control_server', daemon=True)
+        thread.start()
+        logs.info(f'Control server listening on http://{self.hostname}:{self.port}')
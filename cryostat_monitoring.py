@@ -10,6 +10,10 @@ Main program that contains a simple user interface that asks which monitoring pr
 should be run. It then monitors the specific temperatures sends messages to a Discord channel.
 The default temperature thresholds can be changed in the config.ini file. The user can also add
 a comment that is included in the messages sent to the Discord channel.
+
+With the --daemon argument, the program runs without the user interface. The program
+mode can be passed as argument and changed later with commands sent to the control
+server (see control_server.py), while the monitoring keeps running.
 ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 """
@@ -18,11 +22,23 @@ a comment that is included in the messages sent to the Discord channel.
 import time
 import datetime as dt
 import configparser
+import argparse
+import threading
+import queue
 from textwrap import dedent
 import traceback
-import mqtt_interface as mqtt
-import discord_access as discord
 import logs
+import checkpoint
+import live_data
+import profiling
+import snapshot_scheduler
+
+
+class ProcedureAborted(Exception):
+    """
+    Raised inside a running program mode when it was stopped by a control command.
+    """
+
 
 class UI():
     def __init__(self):
@@ -49,22 +65,62 @@ class UI():
         if config_defaults['channel_nr_magnet']: self.temp_channels['Magnet']=int(config_defaults['channel_nr_magnet'])
         if config_defaults['channel_nr_fse']: self.temp_channels['FSE']=int(config_defaults['channel_nr_fse'])
         
-        # config_defaults['snapshot_time'] is the day time in hh:mm format, at which a snapshot of the readings is taken during circulation mode.
-        # If it is empty or 'None', no snapshots will be taken.
-        if not config_defaults['snapshot_time']:
-            self.snapshot_daytime = None
-        else:
-            self.snapshot_daytime = dt.time.fromisoformat(config_defaults['snapshot_time'])
-        
         config_program_modes = config['PROGRAM_MODES']['available_modes'].split('\n')
         self.user_available_programs = [mode for mode in config_program_modes if mode != '']
         
-        # create objects for mqtt client and discord server
-        self.bftc = mqtt.Client_bftc()
-        self.discord_server = discord.Discord_access()
+        # state of the running program mode, used by the control server in daemon mode
+        self.mode = None
+        self.stage = None
+        self.start = time.time()
+        self.circ_val = self.def_circ_val
+        self.abort_event = threading.Event()
+        self.program_requests = queue.Queue()
+        # every request gets a number, only the latest one is started by the daemon
+        self.request_nr = 0
+        self.request_lock = threading.RLock()
+        # a program mode that stopped because of an error is resumed after retry_interval seconds
+        self.retry_interval = 60
+        self.snapshot_lock = threading.Lock()
+        
+        # state of the procedure that is saved after every stage, to resume it after a crash
+        self.checkpoint = checkpoint.Checkpoint()
+        self.procedure = None
+        self.procedure_lock = threading.Lock()
+        self.backfill_since = None
+        self.reached_time = time.time()
+        # the time in the checkpoint is refreshed every heartbeat_interval seconds, so that a
+        # resumed program mode only looks up the readings missed while it was not running
+        self.heartbeat_interval = 60
+        threading.Thread(target=self.heartbeat, name='heartbeat', daemon=True).start()
+        
+        # create objects for mqtt client and notification channels (Discord, webhook, email)
+        # (imported here so that the argument parsing does not wait for paho and requests)
+        import mqtt_interface as mqtt
+        import notifiers
+        self.bftc = mqtt.Client_bftc(stop_event=self.abort_event)
+        self.notifier = notifiers.Notifiers()
+        
+        # receive all readings over MQTT in the background and keep the history
+        # of the readings plotted by the dashboard (none without dashboard)
+        history_days = config.getfloat('DASHBOARD', 'history_days', fallback=7)
+        self.live = live_data.LiveData(history_time=history_days*24*3600, history_names=set())
+        if config.get('DASHBOARD', 'port', fallback=''):
+            import dashboard
+            self.dashboard = dashboard.DashboardServer(self)
+            self.live.history_names.update(name for label, name, unit, log in self.dashboard.channels())
+            self.dashboard.start()
+        self.streams = mqtt.start_streams(self.live)
         
         # setup object for reading and writing pressure and temperature values
-        self.log = logs.ReadLogfiles(self.temp_channels)
+        self.log = logs.ReadLogfiles(self.temp_channels, self.live)
+        
+        # profiler that can be switched on with a signal or the control server while running
+        self.profiler = profiling.Profiler()
+        self.profiler.install_signal_handler()
+        
+        # take the scheduled snapshots of the readings in the background (see [SNAPSHOTS] in config.ini)
+        self.scheduler = snapshot_scheduler.SnapshotScheduler(self)
+        self.scheduler.start()
         
     """
     ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -80,12 +136,84 @@ class UI():
         minutes = (time_sec-hours*3600)//60
         return hours, minutes
     
-    def monitor_temp(self,temp_channel, threshold, cooling=True, snapshot_time=None):
+    def monitor_temp(self,temp_channel, threshold, cooling=True):
         """
         Subscribes to temp sensors and checks them until the temp of temp_channel
         is below (or above for cooling=False) the threshold.
         """
-        self.bftc.monitor_temp(temp_channel,threshold,cooling,snapshot_time)
+        if self.abort_event.is_set():
+            raise ProcedureAborted()
+        if self.backfill_since is not None:
+            # resumed in the middle of this stage: check if the threshold was reached
+            # while the program was not running before waiting for it again
+            reached_time = self.log.find_threshold_crossing(temp_channel, threshold, cooling, self.backfill_since)
+            self.backfill_since = None
+            if reached_time is not None:
+                logs.info(f'Threshold {threshold} K of channel {temp_channel} was already reached at '
+                          + dt.datetime.fromtimestamp(reached_time).strftime('%Y/%m/%d %H:%M:%S') + ' (from Bluefors logs)')
+                self.bftc.threshold_reached = True
+                self.reached_time = reached_time
+                return
+        self.bftc.monitor_temp(temp_channel,threshold,cooling)
+        self.reached_time = time.time()
+        if self.bftc.threshold_reached:
+            # the connection worked, later disconnections and errors are reported again
+            for key in ('disconnect', 'program error', 'resumed'):
+                self.notifier.clear_alert(key)
+        if self.abort_event.is_set():
+            raise ProcedureAborted()
+
+    def wait(self,seconds):
+        """
+        Waits for the given time, but returns early if the program mode is stopped.
+        """
+        if self.abort_event.wait(seconds):
+            raise ProcedureAborted()
+
+    def wait_stage(self,seconds):
+        """
+        Waits until the given time has passed since the start of the current stage,
+        so that a resumed program mode does not wait the full time again.
+        """
+        self.wait(max(0, self.procedure['stage_start'] + seconds - time.time()))
+
+    def new_stage(self,name):
+        """
+        Marks the transition to the next stage of the running program mode and saves
+        the procedure state in the checkpoint file. Returns False if the stage was
+        already completed before the program mode was resumed, so it can be skipped.
+        """
+        self.backfill_since = None
+        if name in self.procedure['completed']:
+            return False
+        with self.procedure_lock:
+            if self.procedure['stage'] == name:
+                # resumed in this stage: keep its start time and look up the readings
+                # missed since the program was last alive
+                self.backfill_since = max(self.procedure['stage_start'], self.procedure.get('alive', 0))
+            else:
+                if self.procedure['stage'] is not None:
+                    self.procedure['completed'].append(self.procedure['stage'])
+                self.procedure['stage'] = name
+                self.procedure['stage_start'] = time.time()
+            self.stage = name
+            self.procedure['alive'] = time.time()
+            self.checkpoint.save(self.procedure)
+        return True
+
+    def heartbeat(self):
+        """
+        Saves the current time in the checkpoint while a program mode is running.
+        """
+        while True:
+            time.sleep(self.heartbeat_interval)
+            try:
+                with self.procedure_lock:
+                    if self.procedure is not None and self.procedure['stage'] is not None:
+                        self.procedure['alive'] = time.time()
+                        self.checkpoint.save(self.procedure)
+            except Exception:
+                traceback.print_exc()
 
     def _50K_temp(self,time_start, threshold, cooling=True):
         """
@@ -93,15 +221,14 @@ class UI():
         to reach the threshold.
         """
         self.monitor_temp(self.temp_channels['50K'],threshold, cooling)
-        time_passed = time.time() - time_start
+        time_passed = self.reached_time - time_start
         hours, minutes = self.convert_sec_to_h_min(time_passed)
         # check if threshold was reached, otherwise repeat monitoring
         if not self.bftc.threshold_reached:
             self.check_disconnect(time_passed)
-            self._50K_temp(time_start,threshold,cooling)
-            return time_passed
+            return self._50K_temp(time_start,threshold,cooling)
         msg = f'50K plate reached {threshold} K after %.0f h ' %(hours) + '%.0f min' %(minutes)
-        self.discord_server.send_message(msg)
+        self.notifier.send_message(msg)
         return time_passed
         
     def still_temp(self,time_start, threshold=5, cooling=True):
@@ -110,15 +237,14 @@ class UI():
         to reach the threshold.
         """
         self.monitor_temp(self.temp_channels['Still'],threshold, cooling)
-        time_passed = time.time() - time_start
+        time_passed = self.reached_time - time_start
         hours, minutes = self.convert_sec_to_h_min(time_passed)
         # check if threshold was reached, otherwise repeat monitoring
         if not self.bftc.threshold_reached:
             self.check_disconnect(time_passed)
-            self.still_temp(time_start,threshold,cooling)
-            return time_passed
+            return self.still_temp(time_start,threshold,cooling)
         msg = f'Still reached {threshold} K after %.0f h ' %(hours) + '%.0f min' %(minutes)
-        self.discord_server.send_message(msg)
+        self.notifier.send_message(msg)
         return time_passed
     
     def mxc_temp(self,time_start, threshold, cooling=True):
@@ -127,54 +253,40 @@ class UI():
         to reach the threshold.
         """
         self.monitor_temp(self.temp_channels['MXC'],threshold,cooling)
-        time_passed = time.time() - time_start
+        time_passed = self.reached_time - time_start
         hours, minutes = self.convert_sec_to_h_min(time_passed)
         # check if threshold was reached, otherwise repeat monitoring
         if not self.bftc.threshold_reached:
             self.check_disconnect(time_passed)
-            self.mxc_temp(time_start,threshold,cooling)
-            return time_passed
+            return self.mxc_temp(time_start,threshold,cooling)
         msg = f'MXC reached {threshold*1000} mK after %.0f h ' %(hours) + '%.0f min' %(minutes)
-        self.discord_server.send_message(msg)
+        self.notifier.send_message(msg)
         return time_passed
     
     def circulation_mode(self,threshold):
         """
         Monitors mxc temperature and returns a warning when it goes above threshold.
+        The threshold can be changed while monitoring with set_threshold.
         """
+        self.new_stage('Circulation')
+        # a threshold changed with set_threshold before circulation started is kept
+        self.circ_val = self.procedure['values'].get('circ_val') or threshold
         print('Entered circulation mode')
-        if self.snapshot_daytime:
-            print(f'A snapshot of the readings will be taken every day at {self.snapshot_daytime.strftime("%H:%M")}.')
+        schedule = self.scheduler.current_schedule()
+        if schedule:
+            print(f'A snapshot of the readings will be taken {schedule.describe()}.')
         print('Press Ctrl+C to exit the program')
         print('')
-
-        # figure out whent to take the next snapshot based on the current time and the desired snapshot time
-        now = dt.datetime.now()
-        if self.snapshot_daytime is None:
-            snapshot_time = None
-        else:
-            snapshot_time = dt.datetime.combine(dt.date.today(), self.snapshot_daytime)
-        if snapshot_time < now:
-            # if the snapshot time is in the past, we need to update it to the next day
-            snapshot_time = snapshot_time + dt.timedelta(days=1)
-        self.monitor_temp(self.temp_channels['MXC'], threshold, cooling=False, snapshot_time=snapshot_time)
+        self.monitor_temp(self.temp_channels['MXC'], self.circ_val, cooling=False)
 
         # check if threshold was reached, otherwise repeat monitoring
-        # if the time threshold was reached, take a snapshot of the readings and continue monitoring
+        # (the snapshots are taken by the scheduler without interrupting the monitoring)
         while not self.bftc.threshold_reached:
-            if self.bftc.take_snapshot:
-                self.log.write_values('Base Temperature')
-                msg = dt.datetime.today().strftime('%Y/%m/%d %H:%M:%S')
-                msg += ' - Snapshot of the readings was taken'
-                print(msg)
-                # make sure that the next snapshot will be taken the next day at the same time
-                snapshot_time = snapshot_time + dt.timedelta(days=1)
-            else:
-                self.check_disconnect()
-            self.monitor_temp(self.temp_channels['MXC'], threshold, cooling=False, snapshot_time=snapshot_time)
-        msg = f'MXC surpassed {threshold*1000} mK'
-        self.discord_server.send_warning(msg)
-        self.log.write_values('Unexpected Warmup')
+            self.check_disconnect()
+            self.monitor_temp(self.temp_channels['MXC'], self.circ_val, cooling=False)
+        msg = f'MXC surpassed {self.circ_val*1000} mK'
+        self.notifier.send_warning(msg)
+        self.take_snapshot('Unexpected Warmup')
         return 1
     
     def full_cooldown(self,still_val,baseT_val,circ_val,msg):
@@ -182,98 +294,319 @@ class UI():
         Starts full cooldown and reports when still is cold enough for ciculation
         and when reaching base temperature and then enters circulation mode.
         """
-        self.log.write_values('Before Cooldown')
-        self.discord_server.send_message(msg)
-        pt_start_time = self._50K_temp(self.start,self.PT_start)
+        times = self.procedure['times']
+        if self.new_stage('Before Cooldown'):
+            self.take_snapshot('Before Cooldown')
+            self.notifier.send_message(msg)
+        if self.new_stage('50K'):
+            times['pt_start_time'] = self._50K_temp(self.start,self.PT_start)
 
         # waiting for still temperature
-        still_time = self.still_temp(self.start,still_val)
-        hours, minutes = self.convert_sec_to_h_min(still_time - pt_start_time)
-        msg = f'Time without pumping: %.0f h ' %(hours) + '%.0f min' %(minutes)
-        self.discord_server.send_message(msg)
+        if self.new_stage('Still'):
+            times['still_time'] = self.still_temp(self.start,still_val)
+            hours, minutes = self.convert_sec_to_h_min(times['still_time'] - times['pt_start_time'])
+            msg = f'Time without pumping: %.0f h ' %(hours) + '%.0f min' %(minutes)
+            self.notifier.send_message(msg)
 
         # waiting for MXC temperature
-        baseT_time = self.mxc_temp(self.start,baseT_val)
-        hours, minutes = self.convert_sec_to_h_min(baseT_time - pt_start_time)
-        msg = f'Total cooldown time without pumping: %.0f h ' %(hours) + '%.0f min' %(minutes)
-        self.discord_server.send_message(msg)
-        time.sleep(3600*2)
-        self.log.write_values('Base Temperature')
+        if self.new_stage('MXC'):
+            times['baseT_time'] = self.mxc_temp(self.start,baseT_val)
+            hours, minutes = self.convert_sec_to_h_min(times['baseT_time'] - times['pt_start_time'])
+            msg = f'Total cooldown time without pumping: %.0f h ' %(hours) + '%.0f min' %(minutes)
+            self.notifier.send_message(msg)
+        if self.new_stage('Thermalization'):
+            self.wait_stage(3600*2)
+            self.take_snapshot('Base Temperature')
         self.circulation_mode(circ_val)
 
     def cooldown_4K(self,still_val,msg):
         """
         Starts cooldown to 4K and reports when still is cold enough.
         """
-        self.log.write_values('Before Cooldown')
-        self.discord_server.send_message(msg)
-        pt_start_time = self._50K_temp(self.start,self.PT_start)
-        still_time = self.still_temp(self.start,still_val)
-        hours, minutes = self.convert_sec_to_h_min(still_time - pt_start_time)
-        msg = f'Time without pumping: %.0f h ' %(hours) + '%.0f min' %(minutes)
-        self.discord_server.send_message(msg) 
+        times = self.procedure['times']
+        if self.new_stage('Before Cooldown'):
+            self.take_snapshot('Before Cooldown')
+            self.notifier.send_message(msg)
+        if self.new_stage('50K'):
+            times['pt_start_time'] = self._50K_temp(self.start,self.PT_start)
+        if self.new_stage('Still'):
+            times['still_time'] = self.still_temp(self.start,still_val)
+            hours, minutes = self.convert_sec_to_h_min(times['still_time'] - times['pt_start_time'])
+            msg = f'Time without pumping: %.0f h ' %(hours) + '%.0f min' %(minutes)
+            self.notifier.send_message(msg)
     
     def condense(self,baseT_val,circ_val,msg):
         """
         starts condensing and reports when reaching base temperature
         and then enters circulation mode
         """
-        self.discord_server.send_message(msg)
-        if self.mxc_temp(self.start,baseT_val):
-            time.sleep(3600*2)
-            self.log.write_values('Base Temperature')
-            self.circulation_mode(circ_val)
+        if self.new_stage('Start'):
+            self.notifier.send_message(msg)
+        if self.new_stage('MXC'):
+            self.mxc_temp(self.start,baseT_val)
+        if self.new_stage('Thermalization'):
+            self.wait_stage(3600*2)
+            self.take_snapshot('Base Temperature')
+        self.circulation_mode(circ_val)
     
     def cold_insert(self,still_val,baseT_val,circ_val,msg):
         """
         Starts cold insert and reports when still is cold enough for ciculation
         and when reaching base temperature and then enters circulation mode.
         """
-        self.log.write_values('Save Circulation')
-        self.discord_server.send_message(msg)
-        time.sleep(3600*3)
-        self.still_temp(self.start,still_val)
-        if self.mxc_temp(self.start,baseT_val):
-            time.sleep(3600*2)
-            self.log.write_values('Base Temperature')
-            self.circulation_mode(circ_val)
+        if self.new_stage('Start'):
+            self.take_snapshot('Save Circulation')
+            self.notifier.send_message(msg)
+        if self.new_stage('Insert'):
+            self.wait_stage(3600*3)
+        if self.new_stage('Still'):
+            self.still_temp(self.start,still_val)
+        if self.new_stage('MXC'):
+            self.mxc_temp(self.start,baseT_val)
+        if self.new_stage('Thermalization'):
+            self.wait_stage(3600*2)
+            self.take_snapshot('Base Temperature')
+        self.circulation_mode(circ_val)
     
     def cold_insert_4K(self,still_val,msg):
         """
         Starts cold insert and reports when still is cold enough for ciculation
         and when reaching base temperature and then enters circulation mode.
         """
-        self.log.write_values('Save Circulation')
-        self.discord_server.send_message(msg)
-        time.sleep(3600*3)
-        self.still_temp(self.start,still_val)
+        if self.new_stage('Start'):
+            self.take_snapshot('Save Circulation')
+            self.notifier.send_message(msg)
+        if self.new_stage('Insert'):
+            self.wait_stage(3600*3)
+        if self.new_stage('Still'):
+            self.still_temp(self.start,still_val)
     
     def warmup(self,still_val,msg):
         """
         Starts warm-up and reports when still is warm enough.
         """
-        self.log.write_values('Before Warmup')
-        self.discord_server.send_message(msg)
-        self.still_temp(self.start, still_val, cooling=False)
-        self.log.write_values('Room Temperature')
+        if self.new_stage('Before Warmup'):
+            self.take_snapshot('Before Warmup')
+            self.notifier.send_message(msg)
+        if self.new_stage('Still'):
+            self.still_temp(self.start, still_val, cooling=False)
+            self.take_snapshot('Room Temperature')
     
     def fse_warmup(self,msg):
         """
         Starts FSE warm-up.
         """
-        self.log.write_values('Before FSE Warmup')
-        self.discord_server.send_message(msg)
+        self.take_snapshot('Before FSE Warmup')
+        self.notifier.send_message(msg)
 
     def check_disconnect(self,time=None):
         """
         Returns a message, that the API was disconnected unexpectedly
         """
         if time:
-            msg_time = 'after %.2f h '
+            msg_time = 'after %.2f h ' %(time/3600)
         else:
             msg_time = ''
         msg = 'Disconnected from API ' + msg_time + 'before temperature threshold was reached.'
-        self.discord_server.send_message(msg)
+        self.notifier.send_message(msg, key='disconnect')
+
+    def take_snapshot(self,status):
+        """
+        Writes a snapshot of the readings in the readings logfile. The lock makes sure
+        that snapshots requested by the control server and by the running program mode
+        are not written at the same time.
+        """
+        with self.snapshot_lock:
+            self.log.write_values(status)
+
+    def run_program(self,program_name,comment=None,still_val=None,baseT_val=None,circ_val=None,status=None,procedure=None):
+        """
+        Starts the given program mode without user interaction. Thresholds that
+        are not given are taken from the defaults in the config file.
+        If procedure is given, the program mode is resumed from this saved state
+        and the stages that were already completed are skipped.
+        """
+        self.mode = program_name
+        self.stage = None
+        if procedure is None:
+            self.notifier.clear_alert()
+            self.start = time.time()
+            values = {'comment': comment, 'still_val': still_val, 'baseT_val': baseT_val,
+                      'circ_val': circ_val, 'status': status}
+            self.procedure = {'mode': program_name, 'values': values, 'start': self.start,
+                              'stage': None, 'stage_start': None, 'completed': [], 'times': {}}
+        else:
+            self.start = procedure['start']
+            self.procedure = procedure
+            hours, minutes = self.convert_sec_to_h_min(time.time() - self.start)
+            msg = f'Resumed {program_name} in stage {procedure["stage"]} after %.0f h ' %(hours) + '%.0f min' %(minutes)
+            self.notifier.send_message(msg, key='resumed')
+        msg_comment = ' - Comment: ' + comment if comment else ''
+        if not circ_val: circ_val = self.def_circ_val
+        if not baseT_val: baseT_val = self.def_baseT_val
+
+        finished = False
+        try:
+            self.start_program(program_name, msg_comment, still_val, baseT_val, circ_val, status)
+            finished = True
+        except ProcedureAborted:
+            # stopped on purpose, so there is nothing to resume
+            finished = True
+            raise
+        finally:
+            with self.procedure_lock:
+                if finished and self.procedure['stage'] is not None:
+                    self.checkpoint.clear()
+                self.procedure = None
+            # no program mode is running anymore, so the scheduler stops taking snapshots
+            self.mode = None
+            self.stage = None
+
+    def start_program(self,program_name,msg_comment,still_val,baseT_val,circ_val,status):
+        """
+        Calls the backend function of the program mode.
+        """
+        if program_name == 'Full Cooldown':
+            self.full_cooldown(still_val or self.def_still_val, baseT_val, circ_val, 'Started full cooldown' + msg_comment)
+        elif program_name == 'Cooldown to 4K':
+            self.cooldown_4K(still_val or self.def_still_val_4K_cd, 'Started cooldown to 4K' + msg_comment)
+        elif program_name == 'Condensing':
+            self.condense(baseT_val, circ_val, 'Started mixture condensation' + msg_comment)
+        elif program_name == 'FSE Cold Insert':
+            self.cold_insert(still_val or self.def_still_val_coldinsert, baseT_val, circ_val, 'Started cold insert' + msg_comment)
+        elif program_name == 'FSE Cold Insert 4K':
+            self.cold_insert_4K(still_val or self.def_still_val_coldinsert, 'Started cold insert to 4K' + msg_comment)
+        elif program_name == 'Warmup':
+            self.warmup(still_val or self.def_warmup_val, 'Started warmup' + msg_comment)
+        elif program_name == 'FSE Warmup':
+            self.fse_warmup('FSE warmup started' + msg_comment)
+        elif program_name == 'Circulation Mode':
+            self.circulation_mode(circ_val)
+        elif program_name == 'Reading Snapshot':
+            self.take_snapshot(status or 'Base Temperature')
+        else:
+            raise ValueError(f'Unknown program mode {program_name}')
+
+    #%% Daemon mode
+
+    """
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    Functions used by the control server while running in daemon mode
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    """
+
+    def request_program(self,program_name,**values):
+        """
+        Stops the running program mode and starts program_name with the given
+        thresholds. If program_name is None, the program only stops. Requests that
+        were not started yet are replaced by the new one.
+        """
+        if program_name is not None and program_name not in self.user_available_programs:
+            raise ValueError(f'Unknown program mode {program_name}')
+        with self.request_lock:
+            self.request_nr += 1
+            self.abort_event.set()
+            self.bftc.disconnect()
+            if program_name is not None:
+                self.program_requests.put((self.request_nr, program_name, values))
+
+    def request_resume(self):
+        """
+        Stops the running program mode and resumes the program mode saved in the
+        checkpoint file.
+        """
+        procedure = self.checkpoint.load()
+        if procedure is None:
+            raise ValueError('No program mode to resume')
+        self.request_program(procedure['mode'], procedure=procedure, **procedure['values'])
+        return procedure
+
+    def set_threshold(self,circ_val):
+        """
+        Changes the warning temperature of the circulation mode. If circulation mode
+        is running, the new value is used for the next temperature reading.
+        """
+        self.circ_val = circ_val
+        self.def_circ_val = circ_val
+        if self.stage == 'Circulation':
+            self.bftc.temp_threshold = circ_val
+        # save the new value, so that it is also used after resuming the program mode
+        with self.procedure_lock:
+            if self.procedure is not None:
+                self.procedure['values']['circ_val'] = circ_val
+                if self.procedure['stage'] is not None:
+                    self.checkpoint.save(self.procedure)
+        logs.info(f'Warning temp during circulation changed to {circ_val} K')
+
+    def status(self):
+        """
+        Returns the state of the running program mode and the last readings.
+        """
+        temperatures = {}
+        for name, channel_nr in self.temp_channels.items():
+            temperatures[name] = self.live.get(live_data.temperature_name(channel_nr), max_age=300)
+        readings = {name: self.live.get(name, max_age=300)
+                    for name in ['p1','p2','p3','p4','p5','p6','Flow','Still Heater']}
+        return {'mode': self.mode,
+                'stage': self.stage,
+                'elapsed_h': round((time.time() - self.start)/3600, 2) if self.mode else None,
+                'threshold': getattr(self.bftc, 'temp_threshold', None) if self.mode else None,
+                'circ_val': self.circ_val,
+                'times': self.procedure['times'] if self.procedure else None,
+                'temperatures': temperatures,
+                'readings': readings,
+                }
+
+    def run_daemon(self,program_name=None,resume=False,**values):
+        """
+        Runs the program without user interface. Program modes are started from the
+        command line arguments or from the control server and run one after the other.
+        """
+        import control_server
+        server = control_server.ControlServer(self)
+        server.start()
+        if resume:
+            try:
+                self.request_resume()
+            except ValueError as e:
+                # e.g. started by a watchdog that always passes --resume, wait for commands
+                logs.info(f'{e}, waiting for commands of the control server')
+        elif program_name:
+            self.request_program(program_name, **values)
+        while True:
+            request_nr, program_name, values = self.program_requests.get()
+            with self.request_lock:
+                if request_nr != self.request_nr:
+                    # stopped or replaced by a newer request before it was started
+                    continue
+                self.abort_event.clear()
+            logs.info(f'Daemon started program mode {program_name}')
+            try:
+                self.run_program(program_name, **values)
+            except ProcedureAborted:
+                logs.info(f'Program mode {program_name} was stopped by a control command')
+            except Exception as e:
+                traceback.print_exc()
+                self.retry_program(program_name, e)
+
+    def retry_program(self,program_name,error):
+        """
+        Warns that program_name stopped because of an error (e.g. the broker was not
+        reachable) and resumes it from the checkpoint after retry_interval seconds,
+        unless another program mode was requested in the meantime.
+        """
+        procedure = self.checkpoint.load()
+        if procedure is None or procedure['start'] != self.start:
+            # the program mode did not save a checkpoint, so it cannot be resumed
+            self.notifier.send_warning(f'{program_name} stopped because of an error: {error!r}')
+            return
+        self.notifier.send_warning(f'{program_name} stopped because of an error: {error!r}. '
+                                   + f'It is resumed in {self.retry_interval/60:g} min.', key='program error')
+        if self.abort_event.wait(self.retry_interval):
+            return
+        with self.request_lock:
+            if not self.abort_event.is_set():
+                self.request_resume()
 
     #%% User interface setup
 
@@ -300,7 +633,7 @@ class UI():
         status=input('Enter the current status of the cryostat (default is "Base Temperature"): ')
         print('')
         if not status: status='Base Temperature'
-        self.log.write_values(status)
+        self.run_program('Reading Snapshot',status=status)
         print(f'Snapshot of the readings was taken with the status {status}.')
     
     def ui_circulation_mode(self):
@@ -311,8 +644,7 @@ class UI():
                      Leave empty to use default values.'''))
         circ_val=self.get_cmd_value(f'Warning temp during circulation (default is {self.def_circ_val}): ')
         print('')
-        if not circ_val: circ_val=self.def_circ_val
-        self.circulation_mode(circ_val)
+        self.run_program('Circulation Mode',circ_val=circ_val)
         
     def ui_full_cooldown(self):
         print(dedent('''\
@@ -325,13 +657,7 @@ class UI():
         baseT_val=self.get_cmd_value(f'Base temp of MXC (default is {self.def_baseT_val}): ')
         circ_val=self.get_cmd_value(f'Warning temp during circulation (default is {self.def_circ_val}): ')
         print('')
-        if not still_val: still_val=self.def_still_val
-        if not baseT_val: baseT_val=self.def_baseT_val
-        if not circ_val: circ_val=self.def_circ_val
-        msg = 'Started full cooldown'
-        if comment:
-            msg+=' - Comment: ' + comment
-        self.full_cooldown(still_val,baseT_val,circ_val,msg)
+        self.run_program('Full Cooldown',comment,still_val=still_val,baseT_val=baseT_val,circ_val=circ_val)
         
     def ui_cooldown_4K(self):
         print(dedent('''\
@@ -342,11 +668,7 @@ class UI():
         comment=input('Add comment (otherwise leave blank): ')
         still_val=self.get_cmd_value(f'Still temp when cold (default is {self.def_still_val_4K_cd}): ')
         print('')
-        if not still_val: still_val=self.def_still_val_4K_cd
-        msg = 'Started cooldown to 4K'
-        if comment:
-            msg+=' - Comment: ' + comment
-        self.cooldown_4K(still_val,msg)
+        self.run_program('Cooldown to 4K',comment,still_val=still_val)
         
     def ui_condense(self):
         print(dedent('''\
@@ -358,12 +680,7 @@ class UI():
         baseT_val=self.get_cmd_value(f'Base temp of MXC (default is {self.def_baseT_val}): ')
         circ_val=self.get_cmd_value(f'Warning temp during circulation (default is {self.def_circ_val}): ')
         print('')
-        if not baseT_val: baseT_val=self.def_baseT_val
-        if not circ_val: circ_val=self.def_circ_val
-        msg = 'Started mixture condensation'
-        if comment:
-            msg+=' - Comment: ' + comment
-        self.condense(baseT_val,circ_val,msg)
+        self.run_program('Condensing',comment,baseT_val=baseT_val,circ_val=circ_val)
         
     def ui_cold_insert(self):
         print(dedent('''\
@@ -376,13 +693,7 @@ class UI():
         baseT_val=self.get_cmd_value(f'Base temp of MXC (default is {self.def_baseT_val}): ')
         circ_val=self.get_cmd_value(f'Warning temp during circulation (default is {self.def_circ_val}): ')
         print('')
-        if not still_val_coldinsert: still_val_coldinsert=self.def_still_val_coldinsert
-        if not baseT_val: baseT_val=self.def_baseT_val
-        if not circ_val: circ_val=self.def_circ_val
-        msg = 'Started cold insert'
-        if comment:
-            msg+=' - Comment: ' + comment
-        self.cold_insert(still_val_coldinsert,baseT_val,circ_val,msg)
+        self.run_program('FSE Cold Insert',comment,still_val=still_val_coldinsert,baseT_val=baseT_val,circ_val=circ_val)
     
     def ui_cold_insert_4K(self):
         print(dedent('''\
@@ -393,11 +704,7 @@ class UI():
         comment=input('Add comment (otherwise leave blank): ')
         still_val_coldinsert=self.get_cmd_value(f'Still temp (default is {self.def_still_val_coldinsert}): ')
         print('')
-        if not still_val_coldinsert: still_val_coldinsert=self.def_still_val_coldinsert
-        msg = 'Started cold insert to 4K'
-        if comment:
-            msg+=' - Comment: ' + comment
-        self.cold_insert_4K(still_val_coldinsert,msg)
+        self.run_program('FSE Cold Insert 4K',comment,still_val=still_val_coldinsert)
     
     def ui_warmup(self):
         print(dedent('''\
@@ -408,22 +715,14 @@ class UI():
         comment=input('Add comment (otherwise leave blank): ')
         warmup_val=self.get_cmd_value(f'Still temp when warm (default is {self.def_warmup_val}): ')
         print('')
-        if warmup_val: warmup_val=float(warmup_val)
-        else: warmup_val=self.def_warmup_val
-        msg = 'Started warmup'
-        if comment:
-            msg+=' - Comment: ' + comment
-        self.warmup(warmup_val,msg)
+        self.run_program('Warmup',comment,still_val=warmup_val)
         
     def ui_fse_warmup(self):
         print(dedent('''\
                      User selected FSE Warmup'''))
         comment=input('Add comment (otherwise leave blank): ')
         print('')
-        msg = 'FSE warmup started'
-        if comment:
-            msg+=' - Comment: ' + comment
-        self.fse_warmup(msg)
+        self.run_program('FSE Warmup',comment)
 
     def ui_description(self):
         print(dedent('''\
@@ -514,9 +813,35 @@ class UI():
             
         self.program_interface()
 
-# Run the interface
-ui = UI()
-ui.program_interface()
-
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Monitors the cryostat temperatures and sends messages to a Discord channel.')
+    parser.add_argument('--daemon', action='store_true', help='run without user interface and accept commands from the control server')
+    parser.add_argument('--mode', help='program mode to start in daemon mode, e.g. "Circulation Mode"')
+    parser.add_argument('--comment', help='comment included in the first message')
+    parser.add_argument('--still_val', type=float, help='still temperature threshold in K')
+    parser.add_argument('--baseT_val', type=float, help='base temperature of the MXC in K')
+    parser.add_argument('--circ_val', type=float, help='warning temperature during circulation in K')
+    parser.add_argument('--status', help='status of the cryostat for the Reading Snapshot mode')
+    parser.add_argument('--resume', action='store_true', help='resume the program mode that was running when the program stopped')
+    return parser.parse_args()
 
 
+# Run the interface
+if __name__ == '__main__':
+    args = parse_arguments()
+    ui = UI()
+    if args.daemon:
+        ui.run_daemon(args.mode, resume=args.resume, comment=args.comment, still_val=args.still_val,
+                      baseT_val=args.baseT_val, circ_val=args.circ_val, status=args.status)
+    else:
+        if args.resume:
+            procedure = ui.checkpoint.load()
+            if procedure is None:
+                print('There is no program mode to resume.')
+            else:
+                try:
+                    ui.run_program(procedure['mode'], procedure=procedure, **procedure['values'])
+                except KeyboardInterrupt:
+                    print('')
+                    print('User interrupted the program.')
+        ui.program_interface()
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:32:48 2026
+
+Small web dashboard that shows the current readings and plots of all temperature
+channels, pressures, flow and still heater. The histories are kept in memory
+(see live_data.py) and reduced to about 1000 points per plot before they are sent
+to the browser, so that even a week of readings loads quickly. The hostname, port
+and the length of the history are defined in the config.ini file.
+Open http://<ip address of the control computer>:<port> in a browser to see it.
+
+Pages (all except / answer with JSON):
+    GET /                       the dashboard
+    GET /values                 program mode, stage and last readings
+    GET /history?hours=24       downsampled histories of the last hours
+                                (at most history_days, with 3 to 5000 points per plot)
+"""
+
+import json
+import math
+import time
+import threading
+import configparser
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import live_data
+import logs
+
+
+class DashboardHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == '/':
+            self.send_body(PAGE.encode(), 'text/html; charset=utf-8')
+        elif url.path == '/values':
+            self.send_body(json.dumps(self.server.values()).encode(), 'application/json')
+        elif url.path == '/history':
+            try:
+                hours = float(query.get('hours', ['24'])[0])
+                points = int(query.get('points', [self.server.points])[0])
+                if not math.isfinite(hours):
+                    raise ValueError(hours)
+            except ValueError:
+                self.send_error(400)
+                return
+            # limit the values, so that a request never sends the full history
+            hours = min(max(hours, 0), self.server.history_days*24)
+            points = min(max(points, 3), 5000)
+            self.send_body(json.dumps(self.server.history(hours, points)).encode(), 'application/json')
+        else:
+            self.send_error(404)
+
+    def send_body(self, body, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DashboardServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, ui):
+        # Read config file to define where the dashboard is served
+        config = configparser.ConfigParser(inline_comment_prefixes="#")
+        config.read('config.ini')
+        self.hostname = config.get('DASHBOARD', 'hostname', fallback='0.0.0.0')
+        self.port = config.getint('DASHBOARD', 'port', fallback=8080)
+        self.points = config.getint('DASHBOARD', 'points', fallback=1000)
+        self.history_days = config.getfloat('DASHBOARD', 'history_days', fallback=7)
+        self.ui = ui
+        # downsampled histories are reused for a few seconds, so that several
+        # browsers or a reload do not compute them again
+        self.cache = {}
+        self.cache_time = 10
+        self.cache_lock = threading.Lock()
+        ThreadingHTTPServer.__init__(self, (self.hostname, self.port), DashboardHandler)
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, name='dashboard', daemon=True)
+        thread.start()
+        logs.info(f'Dashboard available on http://{self.hostname}:{self.port}')
+
+    def channels(self):
+        """
+        Returns a list of (label, name in LiveData, unit, log scale) of all plotted readings.
+        """
+        channels = [(label + ' T', live_data.temperature_name(channel_nr), 'K', True)
+                    for label, channel_nr in self.ui.temp_channels.items()]
+        channels += [(f'p{i}', f'p{i}', 'mbar', True) for i in range(1,7)]
+        channels += [('Flow', 'Flow', 'mmol/s', False), ('Still Heater', 'Still Heater', 'W', False)]
+        return channels
+
+    def values(self):
+        status = self.ui.status()
+        readings = [{'label': label, 'unit': unit, 'value': self.ui.live.get(name, max_age=300)}
+                    for label, name, unit, log in self.channels()]
+        return {'mode': status['mode'], 'stage': status['stage'], 'readings': readings}
+
+    def history(self, hours, points):
+        key = (hours, points)
+        with self.cache_lock:
+            # remove the expired histories, so that the cache does not grow
+            now = time.time()
+            for old_key in [k for k, (cache_time, _) in self.cache.items() if cache_time + self.cache_time <= now]:
+                del self.cache[old_key]
+            if key in self.cache:
+                return self.cache[key][1]
+        since = time.time() - hours*3600
+        series = []
+        for label, name, unit, log in self.channels():
+            times, values = self.ui.live.get_history(name, since)
+            if not times:
+                continue
+            times, values = live_data.downsample(times, values, points)
+            series.append({'label': label, 'unit': unit, 'log': log, 't': times, 'v': values})
+        with self.cache_lock:
+            self.cache[key] = (time.time(), series)
+        return series
+
+
+PAGE = '''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Cryostat monitoring</title>
+<style>
+body {font-family: sans-serif; margin: 1em; background: #fafafa;}
+table {border-collapse: collapse; margin-bottom: 1em;}
+td {padding: 2px 12px; border-bottom: 1px solid #ddd;}
+#plots {display: flex; flex-wrap: wrap;}
+.plot {background: white; border: 1px solid #ccc; margin: 4px;}
+</style>
+</head>
+<body>
+<h2>Cryostat monitoring</h2>
+<p id="status"></p>
+<table id="values"></table>
+<p>History:
+<select id="hours" onchange="loadHistory()">
+<option value="1">1 h</option>
+<option value="6">6 h</option>
+<option value="24" selected>24 h</option>
+<option value="72">3 days</option>
+<option value="168">7 days</option>
+</select></p>
+<div id="plots"></div>
+<script>
+function format(v) {
+  if (v === null || v === '') return '-';
+  return Math.abs(v) < 0.01 || Math.abs(v) >= 1e4 ? v.toExponential(3) : v.toPrecision(4);
+}
+
+function loadValues() {
+  fetch('/values').then(r => r.json()).then(data => {
+    document.getElementById('status').textContent =
+      'Program mode: ' + (data.mode || 'none') + (data.stage ? ' (stage ' + data.stage + ')' : '');
+    document.getElementById('values').innerHTML = data.readings.map(r =>
+      '<tr><td>' + r.label + '</td><td>' + format(r.value) + ' ' + r.unit + '</td></tr>').join('');
+  });
+}
+
+function plot(s) {
+  const canvas = document.createElement('canvas');
+  canvas.className = 'plot';
+  canvas.width = 460; canvas.height = 260;
+  const ctx = canvas.getContext('2d');
+  const left = 70, right = 10, top = 20, bottom = 30;
+  const w = canvas.width - left - right, h = canvas.height - top - bottom;
+  const log = s.log && s.v.every(v => v > 0);
+  const y = log ? s.v.map(Math.log10) : s.v;
+  const t0 = s.t[0], t1 = s.t[s.t.length - 1] || t0 + 1;
+  let y0 = Math.min(...y), y1 = Math.max(...y);
+  if (y0 === y1) { y0 -= 1; y1 += 1; }
+  const px = t => left + (t - t0) / (t1 - t0 || 1) * w;
+  const py = v => top + (1 - (v - y0) / (y1 - y0)) * h;
+  ctx.font = '11px sans-serif';
+  ctx.fillText(s.label + ' (' + s.unit + ')', left, 14);
+  ctx.strokeStyle = '#ccc';
+  ctx.strokeRect(left, top, w, h);
+  for (let i = 0; i <= 4; i++) {
+    const v = y0 + (y1 - y0) * i / 4;
+    ctx.fillText(format(log ? Math.pow(10, v) : v), 2, py(v) + 4);
+    const t = t0 + (t1 - t0) * i / 4;
+    const d = new Date(t * 1000);
+    const label = (t1 - t0 > 86400 ? (d.getMonth() + 1) + '/' + d.getDate() + ' ' : '') +
+      d.toTimeString().slice(0, 5);
+    ctx.fillText(label, px(t) - 15, canvas.height - 10);
+  }
+  ctx.strokeStyle = '#1f77b4';
+  ctx.beginPath();
+  y.forEach((v, i) => i ? ctx.lineTo(px(s.t[i]), py(v)) : ctx.moveTo(px(s.t[i]), py(v)));
+  ctx.stroke();
+  return canvas;
+}
+
+function loadHistory() {
+  const hours = document.getElementById('hours').value;
+  fetch('/history?hours=' + hours).then(r => r.json()).then(series => {
+    const plots = document.getElementById('plots');
+    plots.innerHTML = '';
+    series.forEach(s => plots.appendChild(plot(s)));
+  });
+}
+
+loadValues();
+loadHistory();
+setInterval(loadValues, 10000);
+setInterval(loadHistory, 60000);
+</script>
+</body>
+</html>
+'''
@@ -8,11 +8,12 @@ Created on Sat Jan 14 20:39:56 2023
 This file defines a class that allows to send messages on a specific Discord
 channel. The messages are also written in a logfile. The channel URL and
 access token for the specific user are defined in the config.ini file.
+In the monitoring program, the messages are sent through notifiers.Notifiers,
+which also sends them to the other configured channels.
 """
 
 import configparser
 import logs
-import requests
 
 class Discord_access():
     def __init__(self):
@@ -25,24 +26,32 @@ class Discord_access():
         self.discord_channel = config_discord['channel_url']
         self.access_token = config_discord['access_token']
         self.header = {'authorization': self.access_token}
+        # own timeout of this channel, otherwise the one of the [NOTIFY] section
+        self.timeout = float(config.get('DISCORD', 'timeout', fallback='') or config.get('NOTIFY', 'timeout', fallback='') or 10)
         
     def send_message(self,msg):
         """
         Write message in log file and on discord server
         """
         logs.info(msg)
-        payload = {'content': msg}
-        response = requests.post(self.discord_channel, data=payload, headers=self.header)
-        if response.status_code != 200:
-            logs.warning(f"Failed to send message to Discord channel. Status code: {response.status_code}, Response: {response.text}")
+        self.post(msg)
     
     def send_warning(self,msg):
         """
         Write warning in log file and on discord server
         """
         logs.warning(msg)
-        payload = {'content': 'Warning: '+msg}
-        response = requests.post(self.discord_channel, data=payload, headers=self.header)
+        self.post('Warning: '+msg)
+
+    def post(self,content):
+        """
+        Post content on the discord channel. requests is only imported here,
+        so that the program starts quickly and only pays for the import when
+        the first message is sent.
+        """
+        import requests
+        payload = {'content': content}
+        response = requests.post(self.discord_channel, data=payload, headers=self.header, timeout=self.timeout)
         if response.status_code != 200:
             logs.warning(f"Failed to send message to Discord channel. Status code: {response.status_code}, Response: {response.text}")
         
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:21:07 2026
+
+This file defines a small store for the latest readings of the cryostat. The
+readings are received over MQTT (see Client_stream in mqtt_interface.py) and
+are saved under the same names for all kinds of measurements:
+    'CHx T'         temperature of channel x in K
+    'p1' ... 'p6'   pressures of the maxigauge in mbar
+    'Flow'          flow of the mixture in mmol/s
+    'Still Heater'  power of the still heater in W
+Readings that are too old are ignored, so that the log files are read instead.
+The numeric readings of the last history_time seconds are also kept in memory
+(16 bytes per reading) for the names plotted by the dashboard. downsample reduces
+a history to a given number of points with the largest triangle three buckets
+(LTTB) algorithm, which keeps the peaks and the shape of the curve.
+"""
+
+import time
+import threading
+from array import array
+from bisect import bisect_left
+
+
+def temperature_name(channel_nr):
+    """
+    Returns the name under which the temperature of channel_nr is saved.
+    """
+    return f'CH{channel_nr} T'
+
+
+def downsample(times,values,n_out):
+    """
+    Returns n_out of the points (times, values) selected with the LTTB algorithm:
+    the points are split into buckets and from every bucket, the point that forms
+    the largest triangle with the point selected in the previous bucket and the
+    average of the next bucket is kept. The first and last points are always kept.
+    """
+    n = len(times)
+    if n_out >= n or n_out < 3:
+        return list(times), list(values)
+    out_times = [times[0]]
+    out_values = [values[0]]
+    bucket = (n - 2)/(n_out - 2)
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i*bucket) + 1
+        end = int((i + 1)*bucket) + 1
+        next_end = min(int((i + 2)*bucket) + 1, n)
+        avg_time = sum(times[end:next_end])/(next_end - end)
+        avg_value = sum(values[end:next_end])/(next_end - end)
+        time_a = times[a]
+        value_a = values[a]
+        # twice the triangle area, the factor does not matter for the maximum
+        areas = [abs((time_a - avg_time)*(v - value_a) - (time_a - t)*(avg_value - value_a))
+                 for t, v in zip(times[start:end], values[start:end])]
+        a = start + areas.index(max(areas))
+        out_times.append(times[a])
+        out_values.append(values[a])
+    out_times.append(times[-1])
+    out_values.append(values[-1])
+    return out_times, out_values
+
+
+class LiveData:
+    def __init__(self,history_time=7*24*3600,history_names=None):
+        self.readings = {}
+        # {name: (timestamps, values)} of the numeric readings of the last history_time seconds
+        self.histories = {}
+        self.history_time = history_time
+        # names of which the history is kept (all names if None)
+        self.history_names = history_names
+        self.lock = threading.Lock()
+
+    def update(self,name,value,timestamp=None):
+        """
+        Save a new reading. If no timestamp (in seconds since the epoch) is given,
+        the current time is used.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        with self.lock:
+            self.readings[name] = (value, timestamp)
+            if isinstance(value, (int, float)) and (self.history_names is None or name in self.history_names):
+                self.add_to_history(name, value, timestamp)
+
+    def add_to_history(self,name,value,timestamp):
+        """
+        Append a reading to the history of name. Readings older than history_time are
+        removed about once per hour, so that removing them does not take time for
+        every new reading. Has to be called with the lock acquired.
+        """
+        if name not in self.histories:
+            self.histories[name] = (array('d'), array('d'))
+        times, values = self.histories[name]
+        # the same reading can arrive twice (e.g. from two topics), keep the history sorted
+        if times and timestamp <= times[-1]:
+            return
+        times.append(timestamp)
+        values.append(value)
+        if times[0] < timestamp - self.history_time - 3600:
+            i = bisect_left(times, timestamp - self.history_time)
+            del times[:i]
+            del values[:i]
+
+    def get_history(self,name,since=None):
+        """
+        Returns copies of the timestamps and values of name since the given time
+        (in seconds since the epoch).
+        """
+        with self.lock:
+            if name not in self.histories:
+                return array('d'), array('d')
+            times, values = self.histories[name]
+            i = bisect_left(times, since) if since is not None else 0
+            return times[i:], values[i:]
+
+    def get(self,name,max_age=None):
+        """
+        Returns the last reading of name or None if there is no reading
+        or if it is older than max_age seconds.
+        """
+        with self.lock:
+            reading = self.readings.get(name)
+        if reading is None:
+            return None
+        value, timestamp = reading
+        if max_age is not None and timestamp + max_age < time.time():
+            return None
+        return value
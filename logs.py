@@ -14,11 +14,21 @@ import configparser
 import logging
 import sys
 import csv
+import threading
 from datetime import datetime
 from datetime import timedelta
+import live_data
+import alerts
+
+# messages are logged from several threads (control server, scheduler, notifiers),
+# the lock makes sure that no thread closes the handlers while another one writes
+log_lock = threading.Lock()
 
 def setup_logging():
     logfile = 'logfiles/status/%4.f_status.log' %datetime.now().year
+    # close the handlers of the previous call, otherwise every message leaves an open file behind
+    for handler in logging.root.handlers:
+        handler.close()
     logging.root.handlers = []
     logging.basicConfig(level=logging.INFO,
                         format='%(asctime)s %(levelname)s: %(message)s',
@@ -31,26 +41,29 @@ def info(msg):
     Writes info message in logfile. calls setup function every time in order to
     make sure the message is written in the correct file when the date changed.
     """
-    setup_logging()
-    logging.info(msg)
+    with log_lock:
+        setup_logging()
+        logging.info(msg)
 
 def warning(msg):
     """
     Writes warning message in logfile. calls setup function every time in order to
     make sure the message is written in the correct file when the date changed.
     """
-    setup_logging()
-    logging.warning(msg)
+    with log_lock:
+        setup_logging()
+        logging.warning(msg)
 
 
 class ReadLogfiles:
-    def __init__(self,temp_channels: dict):
+    def __init__(self,temp_channels: dict,live=None):
         # Read config file to load the logfile path for pressure and temperature readings
         config = configparser.ConfigParser()
         config.read('config.ini')
         config_logging = config['LOGGING']
         date = datetime.today().strftime('%y-%m-%d')
-        self.infile_path = os.path.join(os.path.realpath(config_logging['input_logfile_path']),date)
+        self.input_logfile_path = os.path.realpath(config_logging['input_logfile_path'])
+        self.infile_path = os.path.join(self.input_logfile_path,date)
         
         # define filepath for logfiles for pressures, temperatures and flow
         self.pressures_file = os.path.join(self.infile_path, 'maxigauge ' + date + '.log')
@@ -59,6 +72,9 @@ class ReadLogfiles:
         self.heaters_file = os.path.join(self.infile_path, 'Heaters ' + date + '.log')
         self.channels_file = os.path.join(self.infile_path, 'Channels ' + date + '.log')
         self.flow_file = os.path.join(self.infile_path, 'Flowmeter ' + date + '.log')
+        # readings received over MQTT (LiveData object), the log files are only read
+        # if a reading is not available there
+        self.live = live
         self.pressures = [0,0,0,0,0,0]
         self.temperatures = [0 for i in temp_channels.values()]
         self.heaters = [0]
@@ -78,18 +94,42 @@ class ReadLogfiles:
     def read_last_line(self,file):
         """
         read and return the last line of a file
+        only the end of the file is read, since the log files can get large
+        """
+        with open(file, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            block = b''
+            # read blocks from the end until the block contains a full line
+            while position > 0 and block.rstrip(b'\r\n').count(b'\n') == 0:
+                step = min(4096, position)
+                position -= step
+                f.seek(position)
+                block = f.read(step) + block
+        last_line = block.rstrip(b'\r\n').split(b'\n')[-1]
+        return last_line.decode().rstrip('\r')
+
+    def read_live(self,values,names):
+        """
+        copy the readings received over MQTT into values if all of them were
+        received in the last 5 minutes. Returns False if they are not available,
+        so that the log files have to be read instead.
         """
-        with open(file) as f:
-            for line in f:
-                pass
-            last_line = line.rstrip('\n')
-        return last_line
+        if self.live is None:
+            return False
+        readings = [self.live.get(name, max_age=300) for name in names]
+        if None in readings:
+            return False
+        values[:] = readings
+        return True
 
     def read_pressures(self):
         """
         read pressure values from pressure logfile
         looks for presence of 'CHx' in line string and then read the value next to it
         """
+        if self.read_live(self.pressures, [f'p{i+1}' for i in range(6)]):
+            return
         line_string = self.read_last_line(self.pressures_file)
         line_list = line_string.split(',')
         for i in range(6):
@@ -101,7 +141,12 @@ class ReadLogfiles:
         read temperature values from temperature logfiles
         loop through log files and get last temperature readings
         """
-        for i,file in enumerate(self.temperatures_files):
+        for i,(channel_nr,file) in enumerate(zip(self.temp_channels.values(),self.temperatures_files)):
+            if self.live is not None:
+                temperature = self.live.get(live_data.temperature_name(channel_nr), max_age=300)
+                if temperature is not None:
+                    self.temperatures[i] = temperature
+                    continue
             # keep entry empty if the last reading was more than 5 minutes ago
             # or if the file is not found (i.e. it was not generated yet)
             try:
@@ -119,6 +164,8 @@ class ReadLogfiles:
         """
         read flow values from heater logfile
         """
+        if self.read_live(self.heaters, ['Still Heater']):
+            return
         try:
             line_string = self.read_last_line(self.channels_file)
             line_list = line_string.split(',')
@@ -136,10 +183,40 @@ class ReadLogfiles:
         """
         read flow values from flowmeter logfile
         """
+        if self.read_live(self.flow, ['Flow']):
+            return
         line_string = self.read_last_line(self.flow_file)
         line_list = line_string.split(',')
         self.flow[0] = line_list[-1]
         
+    def find_threshold_crossing(self,channel_nr,threshold,cooling,since):
+        """
+        search the temperature logfiles of channel_nr, starting at the time since
+        (in seconds since the epoch), for the time when the temperature was below (or
+        above for cooling=False) the threshold. The readings have to be confirmed in the
+        same way as the live readings (see alerts.ThresholdConfirmation), so that a single
+        glitch in the logfiles is ignored. Returns the time of the confirmation in seconds
+        since the epoch or None if the threshold was not reached.
+        """
+        confirmation = alerts.ThresholdConfirmation()
+        day = datetime.fromtimestamp(since).date()
+        while day <= datetime.today().date():
+            date = day.strftime('%y-%m-%d')
+            file = os.path.join(self.input_logfile_path, date, f'CH{channel_nr} T ' + date + '.log')
+            if os.path.isfile(file):
+                with open(file) as f:
+                    for line in f:
+                        line_list = line.rstrip('\n').split(',')
+                        try:
+                            timestamp = datetime.strptime(line_list[0] + ' ' + line_list[1],'%d-%m-%y %H:%M:%S').timestamp()
+                            temperature = float(line_list[-1])
+                        except (ValueError, IndexError):
+                            continue
+                        if timestamp >= since and confirmation.update(temperature, threshold, cooling, timestamp):
+                            return timestamp
+            day += timedelta(days=1)
+        return None
+
     def write_in_file(self,line):
         """
         open the file in the write mode
@@ -154,7 +231,7 @@ class ReadLogfiles:
         """
         write readings into a new logfile
         """
-        self.__init__(self.temp_channels)
+        self.__init__(self.temp_channels, self.live)
         date_time = [datetime.today().strftime('%d-%m-%y'),datetime.today().strftime('%H:%M:%S')]
         self.read_pressures()
         p4_p3 = ['%.2e' % (float(self.pressures[3])-float(self.pressures[2]))]
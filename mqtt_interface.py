@@ -9,16 +9,22 @@ The Client_bftc class sets up an MQTT connection to a Bluefors temperature contr
 API and allows to subscribe to a channel and periodically receive temperature readings.
 The monitor_temp function runs in a loop until the specified temperature threshold
 is reached. The IP address of the API is defined in the config.ini file.
+
+The Client_stream class keeps a separate connection open in the background and
+saves all temperature, pressure, flow and heater readings it receives in a LiveData
+object (see live_data.py), without being interrupted when a threshold is reached.
 """
 
 import time
-import datetime as dt
 import json
 import configparser
 import paho.mqtt.client as mqtt
+import live_data
+import alerts
+import logs
 
 class Client_bftc(mqtt.Client):
-    def __init__(self):
+    def __init__(self, stop_event=None):
         # Read config file to setup connection to API
         config = configparser.ConfigParser(inline_comment_prefixes="#")
         config.read('config.ini')
@@ -30,7 +36,13 @@ class Client_bftc(mqtt.Client):
         self.port = int(config_mqtt['port'])
         self.temp_topic = config_mqtt['topic']
         self.threshold_reached = False
-        self.last_snapshot_date = None
+        # threading.Event that is set from outside (e.g. the control server) to
+        # stop the monitoring loop without waiting for the threshold
+        self.stop_event = stop_event
+        # state of the threshold confirmation of every monitored channel, it is kept
+        # when reconnecting so that readings before the reconnection still count and
+        # a confirmed threshold is only cleared by a reading outside the hysteresis band
+        self.confirmations = {}
 
         # Connect to the broker
         self.connect(self.hostname, self.port, 60)
@@ -40,24 +52,28 @@ class Client_bftc(mqtt.Client):
         This function is automatically run whenever a message is sent on the 
         subscribed topic. It reads the temperature and closes the connection
         when the given temperature threshold is reached on the desired channel.
+        Single readings past the threshold are ignored, see alerts.ThresholdConfirmation.
         """
+        if self.stop_event is not None and self.stop_event.is_set():
+            self.disconnect()
+            return
         data = json.loads(msg.payload)
         if (data['channel_nr'] == self.temp_channel) & bool(data['temperature']):
-            # ^ is the xor operator
-            if self.cooling_bool ^ (data['temperature'] > self.temp_threshold):
+            confirmation = self.get_confirmation(self.temp_channel)
+            if confirmation.update(data['temperature'], self.temp_threshold, self.cooling_bool):
                 # Set boolean to True to recognize unwanted disconnections
                 self.threshold_reached = True
                 self.disconnect()
-        
-        now = dt.datetime.now()
-        time_range = dt.timedelta(minutes=2)
 
-        self.take_snapshot = False
-        if self.snapshot_time and self.snapshot_time <= now <= self.snapshot_time + time_range:
-            self.take_snapshot = True
-            self.disconnect()
+    def get_confirmation(self,channel):
+        """
+        Returns the threshold confirmation of channel, see alerts.ThresholdConfirmation.
+        """
+        if channel not in self.confirmations:
+            self.confirmations[channel] = alerts.ThresholdConfirmation()
+        return self.confirmations[channel]
     
-    def monitor_temp(self,channel,threshold,cooling,snapshot_time=None):
+    def monitor_temp(self,channel,threshold,cooling):
         """
         First reconnects to the client, passes function arguments as object attributes
         (otherwise, we cannot send them the the on_msg function) and then subscribes
@@ -70,7 +86,6 @@ class Client_bftc(mqtt.Client):
         self.temp_threshold = threshold
         self.cooling_bool = cooling
         self.threshold_reached = False
-        self.snapshot_time = snapshot_time
         self.subscribe(self.temp_topic,0)
         self.loop_forever()
     
@@ -86,3 +101,116 @@ class Client_bftc(mqtt.Client):
     #     print("Disconnected with result code "+str(rc))
 
 
+class Client_stream(mqtt.Client):
+    def __init__(self,hostname,port,topics,live):
+        """
+        topics is a dict that defines which kind of readings is published on
+        which topic, e.g. {'channel/measurement/listen': 'temperature'}.
+        The kinds are 'temperature', 'pressure', 'flow' and 'heater'.
+        """
+        config = configparser.ConfigParser(inline_comment_prefixes="#")
+        config.read('config.ini')
+        still_heater_nr = config.get('MQTT', 'still_heater_nr', fallback='')
+        self.still_heater_nr = int(still_heater_nr) if still_heater_nr else None
+        
+        mqtt.Client.__init__(self)
+        self.topics = topics
+        self.live = live
+        # topics of which a message could not be read, the warning is only logged once per topic
+        self.failed_topics = set()
+        self.on_connect = self.on_conn
+        self.on_message = self.on_msg
+        # connect in the background and reconnect automatically if the connection is lost
+        self.connect_async(hostname, port, 60)
+        self.loop_start()
+    
+    def on_conn(self, client, userdata, flags, rc):
+        """
+        (Re)subscribe to all topics whenever the connection is established.
+        """
+        for topic in self.topics:
+            self.subscribe(topic,0)
+    
+    def on_msg(self, client, userdata, msg):
+        """
+        Converts the message into readings with the names used by LiveData and saves them.
+        The subscribed topics can contain wildcards (e.g. maxigauge/#).
+        """
+        try:
+            kind = next((kind for topic, kind in self.topics.items() if mqtt.topic_matches_sub(topic, msg.topic)), None)
+            data = json.loads(msg.payload)
+            readings = self.parse_readings(kind, data)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            if msg.topic not in self.failed_topics:
+                self.failed_topics.add(msg.topic)
+                logs.warning(f'Could not read the message on topic {msg.topic}: {e!r}, '
+                             + 'the readings are taken from the log files instead')
+            return
+        timestamp = data.get('timestamp') if isinstance(data, dict) else None
+        if not isinstance(timestamp, (int, float)):
+            timestamp = None
+        for name, value in readings:
+            self.live.update(name, value, timestamp)
+    
+    def parse_readings(self,kind,data):
+        """
+        Returns a list of (name, value) of the readings in the message. Messages can
+        either contain one reading of one channel, like the temperature messages of
+        the BFTC ({'channel_nr': 5, 'temperature': 1.2}), or several readings by name
+        ({'p1': 1e-3, 'p2': ...}).
+        """
+        readings = []
+        if kind == 'temperature':
+            if data['temperature']:
+                readings.append((live_data.temperature_name(data['channel_nr']), float(data['temperature'])))
+        elif kind == 'pressure':
+            if 'channel_nr' in data:
+                readings.append((f'p{data["channel_nr"]}', float(data['pressure'])))
+            else:
+                for i in range(1,7):
+                    for key in (f'p{i}', f'CH{i}', f'ch{i}'):
+                        if key in data:
+                            readings.append((f'p{i}', float(data[key])))
+        elif kind == 'flow':
+            value = data['flow'] if 'flow' in data else data['value']
+            readings.append(('Flow', float(value)))
+        elif kind == 'heater':
+            if self.still_heater_nr is None or data.get('heater_nr') == self.still_heater_nr:
+                # same as in the log files: no value if the heater is switched off
+                if data.get('active', True):
+                    readings.append(('Still Heater', float(data['power'])))
+                else:
+                    readings.append(('Still Heater', ''))
+        return readings
+
+
+def start_streams(live):
+    """
+    Starts the background clients for all topics defined in the config file.
+    Pressure and flow readings can come from a different broker (the gateway).
+    Returns the list of clients.
+    """
+    config = configparser.ConfigParser(inline_comment_prefixes="#")
+    config.read('config.ini')
+    config_mqtt = config['MQTT']
+    hostname = config_mqtt['hostname']
+    port = int(config_mqtt['port'])
+    gateway_hostname = config_mqtt.get('gateway_hostname') or hostname
+    gateway_port = int(config_mqtt.get('gateway_port') or port)
+    
+    controller_topics = {config_mqtt['topic']: 'temperature'}
+    gateway_topics = {}
+    if config_mqtt.get('heater_topic'):
+        controller_topics[config_mqtt['heater_topic']] = 'heater'
+    if config_mqtt.get('pressure_topic'):
+        gateway_topics[config_mqtt['pressure_topic']] = 'pressure'
+    if config_mqtt.get('flow_topic'):
+        gateway_topics[config_mqtt['flow_topic']] = 'flow'
+    
+    if (gateway_hostname, gateway_port) == (hostname, port):
+        controller_topics.update(gateway_topics)
+        gateway_topics = {}
+    clients = [Client_stream(hostname, port, controller_topics, live)]
+    if gateway_topics:
+        clients.append(Client_stream(gateway_hostname, gateway_port, gateway_topics, live))
+    return clients
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 17:40:21 2026
+
+Local stand-ins for a webhook receiver and an SMTP server, to check the notification
+settings without sending real messages. They print every message they receive.
+Start them with
+    python notifier_standins.py [--delay SECONDS]
+and set in the config.ini file:
+    [WEBHOOK]
+    url = http://127.0.0.1:8025/
+    [SMTP]
+    host = 127.0.0.1
+    port = 8026
+Then send a test message with python notifiers.py "test message". With --delay,
+the stand-ins answer slowly, which allows to check that a slow channel does not
+delay the other channels.
+"""
+
+import time
+import json
+import argparse
+import threading
+import socketserver
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+
+class WebhookStandinHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        data = json.loads(self.rfile.read(length) or b'{}')
+        time.sleep(self.server.delay)
+        print(f'Webhook received: {data.get("text")}')
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SmtpStandinHandler(socketserver.StreamRequestHandler):
+    """
+    Understands just enough of the SMTP protocol for smtplib to deliver a message.
+    """
+    def reply(self, line):
+        self.wfile.write((line + '\r\n').encode())
+
+    def handle(self):
+        self.reply('220 stand-in SMTP server ready')
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode(errors='replace').rstrip('\r\n')
+            if not line:
+                return
+            command = line[:4].upper()
+            if command in ('EHLO', 'HELO'):
+                self.reply('250 stand-in')
+            elif command in ('MAIL', 'RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif command == 'RCPT':
+                recipients.append(line.split(':', 1)[-1].strip())
+                self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                while True:
+                    data_line = self.rfile.readline().decode(errors='replace').rstrip('\r\n')
+                    if data_line == '.':
+                        break
+                    lines.append(data_line)
+                time.sleep(self.server.delay)
+                subject = next((l for l in lines if l.startswith('Subject:')), 'Subject: -')
+                print(f'SMTP received for {", ".join(recipients)}: {subject}')
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class SmtpStandin(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def start_standins(webhook_port=8025, smtp_port=8026, delay=0):
+    """
+    Starts both stand-ins in background threads and returns the servers.
+    """
+    webhook = HTTPServer(('127.0.0.1', webhook_port), WebhookStandinHandler)
+    smtp = SmtpStandin(('127.0.0.1', smtp_port), SmtpStandinHandler)
+    for server in (webhook, smtp):
+        server.delay = delay
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return webhook, smtp
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local stand-ins for a webhook receiver and an SMTP server.')
+    parser.add_argument('--webhook_port', type=int, default=8025)
+    parser.add_argument('--smtp_port', type=int, default=8026)
+    parser.add_argument('--delay', type=float, default=0, help='time in seconds before answering a message')
+    args = parser.parse_args()
+    start_standins(args.webhook_port, args.smtp_port, args.delay)
+    print(f'Webhook stand-in on http://127.0.0.1:{args.webhook_port}/, SMTP stand-in on 127.0.0.1:{args.smtp_port}')
+    print('Press Ctrl+C to exit')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
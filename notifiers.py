@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 16:08:55 2026
+
+This file defines the notification channels of the monitoring program and the
+Notifiers class that sends every message to several of them at the same time.
+Available channels:
+    discord   Discord channel (see discord_access.py)
+    webhook   HTTP POST of a JSON message to any URL (e.g. Slack, Mattermost, Teams)
+    smtp      email sent over an SMTP server
+Which channels receive messages (info) and warnings (warning) is defined in the
+[NOTIFY] section of the config.ini file. Every channel is called in its own thread
+and has its own timeout, so a slow or unreachable channel never delays the others.
+All messages are also written in the status logfile. Messages with a key are only
+sent once within the alert_interval of the [ALERTS] section, until the key is cleared.
+
+To send a test message over the configured channels, run:
+    python notifiers.py "test message"
+Local stand-ins for the webhook and SMTP server are available in notifier_standins.py.
+"""
+
+import sys
+import configparser
+import smtplib
+from email.message import EmailMessage
+from concurrent.futures import ThreadPoolExecutor, wait
+import logs
+import alerts
+
+
+class Webhook_access():
+    def __init__(self):
+        config = configparser.ConfigParser(inline_comment_prefixes="#")
+        config.read('config.ini')
+        self.url = config['WEBHOOK']['url']
+        # own timeout of this channel, otherwise the one of the [NOTIFY] section
+        self.timeout = float(config.get('WEBHOOK', 'timeout', fallback='') or config.get('NOTIFY', 'timeout', fallback='') or 10)
+
+    def post(self,content):
+        """
+        Post the content as JSON. 'text' is used by most chat services, 'content' by Discord.
+        """
+        import requests
+        response = requests.post(self.url, json={'text': content, 'content': content}, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class Smtp_access():
+    def __init__(self):
+        config = configparser.ConfigParser(inline_comment_prefixes="#")
+        config.read('config.ini')
+        config_smtp = config['SMTP']
+        self.host = config_smtp['host']
+        self.port = int(config_smtp.get('port') or 25)
+        self.starttls = config_smtp.getboolean('starttls', fallback=False)
+        self.username = config_smtp.get('username', '')
+        self.password = config_smtp.get('password', '')
+        self.sender = config_smtp['sender']
+        self.recipients = [address.strip() for address in config_smtp['recipients'].split(',') if address.strip()]
+        # own timeout of this channel, otherwise the one of the [NOTIFY] section
+        self.timeout = float(config.get('SMTP', 'timeout', fallback='') or config.get('NOTIFY', 'timeout', fallback='') or 10)
+
+    def post(self,content):
+        """
+        Send the content as email, the first line is used as subject.
+        """
+        email = EmailMessage()
+        email['Subject'] = 'Cryostat monitoring: ' + content.splitlines()[0][:100]
+        email['From'] = self.sender
+        email['To'] = ', '.join(self.recipients)
+        email.set_content(content)
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as server:
+            if self.starttls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password)
+            server.send_message(email)
+
+
+class Notifiers():
+    def __init__(self):
+        # Read config file to define which channels receive which messages
+        config = configparser.ConfigParser(inline_comment_prefixes="#")
+        config.read('config.ini')
+        self.routes = {'info': config.get('NOTIFY', 'info', fallback='discord'),
+                       'warning': config.get('NOTIFY', 'warning', fallback='discord')}
+        self.routes = {severity: [name.strip() for name in names.split(',') if name.strip()]
+                       for severity, names in self.routes.items()}
+
+        # only create the channels that are used
+        channel_types = {'discord': self.discord, 'webhook': Webhook_access, 'smtp': Smtp_access}
+        self.channels = {}
+        for name in set(self.routes['info'] + self.routes['warning']):
+            if name not in channel_types:
+                raise ValueError(f'Unknown notification channel {name} in config.ini')
+            self.channels[name] = channel_types[name]()
+        self.executor = ThreadPoolExecutor(max_workers=4*max(len(self.channels), 1), thread_name_prefix='notifier')
+        self.limiter = alerts.AlertLimiter()
+
+    def discord(self):
+        import discord_access
+        return discord_access.Discord_access()
+
+    def send_message(self,msg,key=None):
+        """
+        Write message in log file and send it to the info channels. Messages with
+        a key are only sent once within the alert_interval.
+        """
+        logs.info(msg)
+        if key is not None and not self.limiter.allow(key):
+            return
+        self.send(msg, 'info')
+
+    def send_warning(self,msg,key=None):
+        """
+        Write warning in log file and send it to the warning channels. Warnings with
+        a key are only sent once within the alert_interval.
+        """
+        logs.warning(msg)
+        if key is not None and not self.limiter.allow(key):
+            logs.info('Warning was already sent recently, it is not sent again.')
+            return
+        self.send('Warning: '+msg, 'warning')
+
+    def clear_alert(self,key=None):
+        """
+        Allow the message with key (or all messages) to be sent again, when its
+        condition is over or a new program mode starts.
+        """
+        self.limiter.clear(key)
+
+    def send(self,content,severity):
+        """
+        Sends content to all channels of the severity at the same time and waits at most
+        the longest timeout of these channels. Failed or slow channels are written in the
+        log file.
+        """
+        futures = {self.executor.submit(self.channels[name].post, content): name
+                   for name in self.routes[severity]}
+        timeout = max((self.channels[name].timeout for name in self.routes[severity]), default=0)
+        done, not_done = wait(futures, timeout=timeout)
+        for future in done:
+            if future.exception() is not None:
+                logs.warning(f'Failed to send message over {futures[future]}: {future.exception()!r}')
+        for future in not_done:
+            name = futures[future]
+            logs.warning(f'Sending message over {name} did not finish within {self.channels[name].timeout} s')
+
+
+if __name__ == '__main__':
+    msg = sys.argv[1] if len(sys.argv) > 1 else 'Test message of the cryostat monitoring'
+    notifiers = Notifiers()
+    notifiers.send_message(msg)
+    notifiers.send_warning(msg)
+    notifiers.executor.shutdown()
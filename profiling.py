@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:14:26 2026
+
+This file defines a profiler that can be switched on and off while the program is
+running, to find out why the program uses more memory or CPU after running for a
+long time. While it is running, it
+ - samples the call stacks of all threads (sampling CPU profile),
+ - takes tracemalloc snapshots and compares them with the previous and the first one,
+ - counts the open file handles and logging handlers.
+Every report_interval seconds, a report is written in logfiles/profiling/. The CPU
+profile is written in the collapsed stack format ("func1;func2;func3 count"), which
+can be plotted as a flame graph, e.g. with https://www.speedscope.app.
+
+The profiler is switched on and off by sending SIGUSR1 (Linux) or pressing
+Ctrl+Break (Windows) to the program, or with the /profile command of the control
+server. The intervals are defined in the [PROFILING] section of the config.ini file.
+"""
+
+import os
+import io
+import gc
+import sys
+import time
+import signal
+import logging
+import threading
+import tracemalloc
+import configparser
+from collections import Counter
+from datetime import datetime
+import logs
+
+
+def count_open_files():
+    """
+    Returns the number of open file handles of the process. On Linux, they are
+    counted directly, otherwise only the file objects opened by python are counted.
+    """
+    if os.path.isdir('/proc/self/fd'):
+        return len(os.listdir('/proc/self/fd'))
+    count = 0
+    for obj in gc.get_objects():
+        try:
+            if isinstance(obj, io.IOBase) and not obj.closed:
+                count += 1
+        except Exception:
+            pass
+    return count
+
+
+class Profiler:
+    def __init__(self):
+        # Read config file to define the sampling and report intervals
+        config = configparser.ConfigParser(inline_comment_prefixes="#")
+        config.read('config.ini')
+        self.sample_interval = config.getfloat('PROFILING', 'sample_interval', fallback=0.01)
+        self.report_interval = config.getfloat('PROFILING', 'report_interval', fallback=600)
+        self.top_n = config.getint('PROFILING', 'top_n', fallback=20)
+        self.outdir = config.get('PROFILING', 'output_path', fallback='logfiles/profiling')
+        self.running = False
+        self.stop_event = threading.Event()
+        self.thread = None
+        # a signal and a control command can switch the profiler at the same time
+        self.lock = threading.RLock()
+
+    def install_signal_handler(self):
+        """
+        Switch the profiler on and off with a signal. Has to be called from the main thread.
+        The handler only starts a thread, because the main thread may hold the lock of
+        the logging functions when the signal arrives.
+        """
+        signum = getattr(signal, 'SIGUSR1', None) or getattr(signal, 'SIGBREAK', None)
+        if signum is not None:
+            signal.signal(signum, lambda signum, frame: threading.Thread(target=self.toggle, daemon=True).start())
+
+    def toggle(self):
+        with self.lock:
+            if self.running:
+                self.stop()
+            else:
+                self.start()
+            return self.running
+
+    def start(self):
+        with self.lock:
+            if self.running:
+                return
+            os.makedirs(self.outdir, exist_ok=True)
+            self.running = True
+            self.stop_event.clear()
+            self.stacks = Counter()
+            self.samples = 0
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(10)
+            self.first_snapshot = self.take_snapshot()
+            self.last_snapshot = self.first_snapshot
+            self.start_time = time.time()
+            self.thread = threading.Thread(target=self.run, name='profiler', daemon=True)
+            self.thread.start()
+            logs.info(f'Profiler started, reports are written in {self.outdir}')
+
+    def stop(self):
+        with self.lock:
+            if not self.running:
+                return
+            self.stop_event.set()
+            self.thread.join()
+            self.running = False
+            self.write_report()
+            tracemalloc.stop()
+            logs.info('Profiler stopped')
+
+    def run(self):
+        """
+        Samples the stacks until the profiler is stopped and writes a report
+        every report_interval seconds.
+        """
+        next_report = time.time() + self.report_interval
+        own_thread = threading.get_ident()
+        while not self.stop_event.wait(self.sample_interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_thread:
+                    self.stacks[self.collapse(frame)] += 1
+            self.samples += 1
+            if time.time() >= next_report:
+                self.write_report()
+                next_report = time.time() + self.report_interval
+
+    def collapse(self,frame):
+        """
+        Returns the stack of frame as 'outer_function;...;inner_function'.
+        """
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def take_snapshot(self):
+        """
+        Takes a tracemalloc snapshot without the memory used by tracemalloc itself.
+        """
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ])
+
+    def write_report(self):
+        """
+        Writes the CPU profile since the start and a memory report with the top
+        allocations and their growth since the last and the first snapshot.
+        """
+        stamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+        with open(os.path.join(self.outdir, f'{stamp}_cpu.txt'), 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+        snapshot = self.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f'Profiling since {datetime.fromtimestamp(self.start_time):%Y/%m/%d %H:%M:%S}, {self.samples} stack samples',
+                 f'Traced memory: {current/1e6:.2f} MB (peak {peak/1e6:.2f} MB)',
+                 f'Open file handles: {count_open_files()}',
+                 f'Logging handlers: {len(logging.root.handlers)}',
+                 f'Threads: {threading.active_count()}',
+                 '',
+                 f'Top {self.top_n} allocations:']
+        lines += [str(stat) for stat in snapshot.statistics('lineno')[:self.top_n]]
+        lines += ['', f'Top {self.top_n} changes since last report:']
+        lines += [str(stat) for stat in snapshot.compare_to(self.last_snapshot, 'lineno')[:self.top_n]]
+        lines += ['', f'Top {self.top_n} changes since start:']
+        lines += [str(stat) for stat in snapshot.compare_to(self.first_snapshot, 'lineno')[:self.top_n]]
+        with open(os.path.join(self.outdir, f'{stamp}_memory.txt'), 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        self.last_snapshot = snapshot
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 13:52:40 2026
+
+This file defines a scheduler that takes snapshots of the readings in the background
+while a program mode is running, without interrupting the temperature monitoring.
+The schedules are defined per program mode or stage in the [SNAPSHOTS] section of
+the config.ini file, e.g.
+    Condensing = every 10 min
+    Warmup = every 1 h
+    Circulation = daily 06:00, Base Temperature
+The text after the comma is the status written in the readings logfile (by default
+the name of the program mode or stage). If the section is missing, a snapshot is
+taken every day at the snapshot_time of the [DEFAULTS] section in circulation.
+"""
+
+import time
+import datetime as dt
+import threading
+import configparser
+import traceback
+
+
+class Schedule:
+    units = {'s': 1, 'sec': 1, 'min': 60, 'h': 3600, 'd': 86400}
+    # a daily snapshot is only taken if the scheduler runs within this time after the
+    # snapshot time, so that it is not taken hours later after a restart
+    window = dt.timedelta(minutes=2)
+
+    def __init__(self,key,text):
+        spec, _, status = text.partition(',')
+        spec = spec.split()
+        self.status = status.strip() or key
+        self.interval = None
+        self.daytimes = []
+        if len(spec) == 3 and spec[0] == 'every' and spec[2] in self.units:
+            self.interval = float(spec[1])*self.units[spec[2]]
+        elif len(spec) >= 2 and spec[0] == 'daily':
+            self.daytimes = [dt.time.fromisoformat(daytime) for daytime in spec[1:]]
+        else:
+            raise ValueError(f'Invalid snapshot schedule for {key}: {text}')
+        self.last_run = None
+
+    def activate(self,now):
+        """
+        Called when the program mode or stage of this schedule starts. Intervals are
+        counted from this moment, daily snapshots are not affected.
+        """
+        if self.interval is not None:
+            self.last_run = now
+
+    def due(self,now):
+        """
+        Returns True if a snapshot has to be taken at the time now (datetime).
+        A snapshot is never taken twice for the same daily time or interval.
+        """
+        if self.interval is not None:
+            return (now - self.last_run).total_seconds() >= self.interval
+        for daytime in self.daytimes:
+            snapshot_time = dt.datetime.combine(now.date(), daytime)
+            if snapshot_time <= now <= snapshot_time + self.window:
+                if self.last_run is None or self.last_run < snapshot_time:
+                    return True
+        return False
+
+    def describe(self):
+        if self.interval is not None:
+            return f'every {self.interval/60:g} min'
+        return 'every day at ' + ', '.join(daytime.strftime('%H:%M') for daytime in self.daytimes)
+
+
+class SnapshotScheduler:
+    def __init__(self,ui):
+        # Read config file to define the schedules
+        config = configparser.ConfigParser(inline_comment_prefixes="#")
+        config.optionxform = str  # keep the case of the program modes
+        config.read('config.ini')
+        self.schedules = {}
+        if config.has_section('SNAPSHOTS'):
+            for key, text in config['SNAPSHOTS'].items():
+                if text:
+                    self.schedules[key] = Schedule(key, text)
+        elif config.get('DEFAULTS', 'snapshot_time', fallback=''):
+            self.schedules['Circulation'] = Schedule('Circulation', 'daily ' + config['DEFAULTS']['snapshot_time'] + ', Base Temperature')
+        self.ui = ui
+        self.check_interval = 10
+        self.active = None
+        self.stop_event = threading.Event()
+
+    def current_schedule(self):
+        """
+        Returns the schedule of the running stage or, if there is none, of the program mode.
+        """
+        for key in (self.ui.stage, self.ui.mode):
+            if key in self.schedules:
+                return self.schedules[key]
+        return None
+
+    def start(self):
+        thread = threading.Thread(target=self.run, name='snapshot_scheduler', daemon=True)
+        thread.start()
+
+    def run(self):
+        while not self.stop_event.wait(self.check_interval):
+            try:
+                self.check()
+            except Exception:
+                traceback.print_exc()
+
+    def check(self):
+        now = dt.datetime.now()
+        schedule = self.current_schedule()
+        if schedule is not self.active:
+            self.active = schedule
+            if schedule is not None:
+                schedule.activate(now)
+        if schedule is not None and schedule.due(now):
+            schedule.last_run = now
+            self.ui.take_snapshot(schedule.status)
+            print(now.strftime('%Y/%m/%d %H:%M:%S') + ' - Snapshot of the readings was taken')
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:12:07 2026
+
+Tests of the threshold confirmation in alerts.py, run them with python -m pytest.
+They use the default values of the [ALERTS] section (3 of 5 readings, 5% hysteresis).
+"""
+
+import pytest
+import alerts
+
+
+@pytest.fixture
+def confirmation(tmp_path, monkeypatch):
+    # run in an empty directory, so that the defaults are used instead of config.ini
+    monkeypatch.chdir(tmp_path)
+    return alerts.ThresholdConfirmation()
+
+
+def test_single_glitch_near_threshold_is_ignored(confirmation):
+    readings = [0.097, 0.097, 0.12, 0.097, 0.097]
+    results = [confirmation.update(t, 0.1, cooling=False, timestamp=i) for i, t in enumerate(readings)]
+    assert results == [False]*5
+
+
+def test_threshold_is_confirmed_after_enough_readings(confirmation):
+    readings = [0.097, 0.12, 0.097, 0.12, 0.12]
+    results = [confirmation.update(t, 0.1, cooling=False, timestamp=i) for i, t in enumerate(readings)]
+    assert results == [False, False, False, False, True]
+
+
+def test_confirmed_threshold_is_only_cleared_outside_the_band(confirmation):
+    for i in range(3):
+        confirmation.update(0.12, 0.1, cooling=False, timestamp=i)
+    # 0.097 is below the threshold, but still within the 5% band
+    assert confirmation.update(0.097, 0.1, cooling=False, timestamp=3)
+    # 0.09 left the band, the threshold has to be confirmed again
+    assert not confirmation.update(0.09, 0.1, cooling=False, timestamp=4)
+    assert not confirmation.update(0.12, 0.1, cooling=False, timestamp=5)
+
+
+def test_cooling_threshold(confirmation):
+    readings = [4.2, 3.9, 3.9, 3.9]
+    results = [confirmation.update(t, 4, cooling=True, timestamp=i) for i, t in enumerate(readings)]
+    assert results == [False, False, False, True]
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:21:35 2026
+
+Tests of the threshold monitoring of Client_bftc, run them with python -m pytest.
+The messages are passed directly to on_msg, so no broker is needed. They use the
+default values of the [ALERTS] section (3 of 5 readings, 5% hysteresis).
+"""
+
+import json
+from types import SimpleNamespace
+import pytest
+import mqtt_interface
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'config.ini').write_text('[MQTT]\nhostname = 127.0.0.1\nport = 1883\ntopic = channel/measurement/listen\n')
+    # there is no broker in the tests
+    monkeypatch.setattr(mqtt_interface.mqtt.Client, 'connect', lambda *args, **kwargs: 0)
+    client = mqtt_interface.Client_bftc()
+    # same attributes as set by monitor_temp for the circulation mode
+    client.temp_channel = 6
+    client.temp_threshold = 0.1
+    client.cooling_bool = False
+    return client
+
+
+def send(client, temperature, channel_nr=6):
+    payload = json.dumps({'channel_nr': channel_nr, 'temperature': temperature})
+    client.on_msg(client, None, SimpleNamespace(topic='channel/measurement/listen', payload=payload))
+    return client.threshold_reached
+
+
+def test_single_glitch_does_not_reach_threshold(client):
+    assert [send(client, t) for t in [0.097, 0.097, 0.12, 0.097, 0.097]] == [False]*5
+
+
+def test_readings_of_other_channels_are_ignored(client):
+    assert [send(client, 0.12, channel_nr=5) for i in range(5)] == [False]*5
+
+
+def test_confirmed_threshold_is_kept_within_hysteresis_band(client):
+    assert [send(client, 0.12) for i in range(3)] == [False, False, True]
+    # monitoring again after the threshold was reached (as in the monitoring loop)
+    client.threshold_reached = False
+    assert send(client, 0.097)
+    client.threshold_reached = False
+    # 0.09 left the band, the threshold has to be confirmed again
+    assert not send(client, 0.09)
+    assert not send(client, 0.12)
+
+
+def test_new_threshold_resets_the_window(client):
+    send(client, 0.12)
+    send(client, 0.12)
+    client.temp_threshold = 0.2
+    assert [send(client, 0.25) for i in range(3)] == [False, False, True]
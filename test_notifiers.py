@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 11:02:48 2026
+
+Tests of the notification channels against the local stand-ins of notifier_standins.py,
+run them with python -m pytest. No message is sent outside of the local machine.
+"""
+
+import time
+import pytest
+import notifier_standins
+import notifiers
+
+pytest.importorskip('requests')
+
+
+@pytest.fixture
+def standins(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'logfiles' / 'status').mkdir(parents=True)
+    # the webhook answers after its timeout, the SMTP server answers immediately
+    webhook, smtp = notifier_standins.start_standins(webhook_port=0, smtp_port=0, delay=1.5)
+    smtp.delay = 0
+    (tmp_path / 'config.ini').write_text(f'''
+[NOTIFY]
+info = webhook, smtp
+warning = webhook, smtp
+timeout = 0.5
+
+[WEBHOOK]
+url = http://127.0.0.1:{webhook.server_address[1]}/
+
+[SMTP]
+host = 127.0.0.1
+port = {smtp.server_address[1]}
+sender = cryostat@lab
+recipients = user@lab
+''')
+    yield tmp_path
+    for server in (webhook, smtp):
+        server.shutdown()
+        server.server_close()
+
+
+def test_slow_channel_does_not_delay_the_others(standins, capsys):
+    notifier = notifiers.Notifiers()
+    start = time.time()
+    notifier.send_message('test message')
+    duration = time.time() - start
+    notifier.executor.shutdown()
+
+    # send returns after the timeout of the channels, not after the delay of the webhook
+    assert duration < 1.2
+    assert 'SMTP received for <user@lab>: Subject: Cryostat monitoring: test message' in capsys.readouterr().out
+    status_log = next((standins / 'logfiles' / 'status').iterdir()).read_text()
+    assert 'Failed to send message over webhook' in status_log or 'over webhook did not finish' in status_log